@@ -5,7 +5,7 @@ generate_assessment.py
 Generates:
  - two images (uniform table, packed-spheres top view),
  - a Word (.docx) file containing two MCQs in the given Question Output Format,
- - a github-ready folder with QUESTIONS.md, README.md and images,
+ - a github-ready folder with QUESTIONS.md, README.md, the docx and images,
  - a zip file of that folder.
 
 Optionally initializes a git repo and pushes to a remote URL provided via --push-repo.
@@ -14,131 +14,385 @@ Optionally initializes a git repo and pushes to a remote URL provided via --push
 import argparse
 import os
 import shutil
+import stat
 import zipfile
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO
 from pathlib import Path
 
 # Image libs
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-import matplotlib.pyplot as plt
+
+# Optional: libvips renders and PNG-encodes the spheres image faster than PIL; PIL is used when missing
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
 
 # Document libs
 from docx import Document
 from docx.shared import Inches
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.oxml.shape import CT_Inline
+from docx.image.image import Image as DocxImage
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.parts.image import ImagePart
+
+# Optional: libdeflate's hardware-accelerated CRC32 for zip entries; zlib's is used when missing
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
+# Optional: single-pass streaming zip writer; zipfile is used when missing or when deflate is installed
+try:
+    import stream_zip
+except ImportError:
+    stream_zip = None
+
+# Optional: in-process git via libgit2; falls back to the git CLI when missing
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+# Already-compressed formats are stored as-is in the zip; re-deflating them wastes CPU.
+STORED_EXTS = {".png", ".docx", ".jpg", ".zip"}
+# Entries this small are stored too: per-entry DEFLATE setup costs more than it saves.
+STORED_BELOW_BYTES = 4096
+# Mode recorded for every zip entry: regular file, rw-r--r--
+ZIP_ENTRY_MODE = stat.S_IFREG | 0o644
+
+# Docx skeleton with the heading and {{...}} placeholder paragraphs filled in by create_docx.
+TEMPLATE_DOCX = Path(__file__).resolve().parent / "assets" / "template.docx"
+
+# Single source of truth for the question text, shared by the docx and QUESTIONS.md.
+TITLE = "@title Central Middle — Derived Assessment"
+DESCRIPTION = "@description Two generated quantitative math questions similar to the base examples."
+QUESTIONS = [
+    [
+        "@question Each student at Riverside Prep chooses a uniform consisting of 1 shirt, 1 pair of pants, and 1 hat. The table shows the available options for each item. How many different complete uniforms are possible?",
+        "@instruction Select the number of possible uniform combinations from the options.",
+        "@difficulty easy",
+        "@Order 1",
+        "@option (A) 18",
+        "@option (B) 24",
+        "@@option (C) 36",
+        "@option (D) 48",
+        "@option (E) 72",
+        "@explanation ",
+        "There are 4 shirt choices, 3 pants choices, and 3 hat choices. Total combinations = 4 × 3 × 3 = 36.",
+        "@subject Quantitative Math",
+        "@unit Numbers and Operations",
+        "@topic Combinations / Counting",
+        "@plusmarks 1",
+    ],
+    [
+        "@question The top view of a rectangular box containing 8 identical tightly packed spherical balls arranged in two rows of four is shown. If each ball has radius $2$ cm, which of the following is closest to the dimensions (height × width × length), in centimeters, of the rectangular package?",
+        "@instruction Choose the correct dimensions from the options.",
+        "@difficulty moderate",
+        "@Order 2",
+        "@option (A) $4 \\times 8 \\times 16$",
+        "@option (B) $2 \\times 8 \\times 16$",
+        "@@option (C) $4 \\times 12 \\times 18$",
+        "@option (D) $6 \\times 8 \\times 16$",
+        "@option (E) $8 \\times 12 \\times 24$",
+        "@explanation ",
+        "Top view shows two rows and four columns of circles (diameter = 4 cm). Width (short side) = 2 rows × 4 cm = 8 cm. Length = 4 columns × 4 cm = 16 cm. Height must accommodate one layer of balls: diameter = 4 cm. So dimensions: $4 \\times 8 \\times 16$.",
+        "@subject Quantitative Math",
+        "@unit Geometry and Measurement",
+        "@topic Solid Figures / Coordinate Geometry",
+        "@plusmarks 1",
+    ],
+]
+QUESTIONS_MD = (
+    f"{TITLE}\n{DESCRIPTION}\n\n"
+    + "\n\n".join(f"// Question {n}\n" + "\n".join(lines) for n, lines in enumerate(QUESTIONS, 1))
+    + "\n"
+)
+
+_FONT = None
+
+def _get_font():
+    """Load PIL's default font once and reuse it across calls."""
+    global _FONT
+    if _FONT is None:
+        _FONT = ImageFont.load_default()
+    return _FONT
+
+def _save_png(img, path: Path) -> bytes:
+    """Encode a PIL image as PNG once, write it to path and return the bytes."""
+    buf = BytesIO()
+    img.save(buf, "PNG", compress_level=1, optimize=False)
+    data = buf.getvalue()
+    path.write_bytes(data)
+    print(f"Created {path}")
+    return data
 
-def make_uniform_image(path: Path):
-    """Create a simple visual table image listing shirt/pants/hat colors."""
-    img = Image.new("RGB", (900, 280), "white")
-    draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.load_default()
-    except Exception:
-        font = None
-
-    draw.text((10, 10), "Available Options", fill="black", font=font)
-    draw.text((20, 40), "Shirts:", fill="black", font=font)
+def make_uniform_image(path: Path) -> bytes:
+    """Create a simple visual table image listing shirt/pants/hat colors; returns the PNG bytes."""
     shirts = ["Tan", "Red", "White", "Yellow"]
     pants = ["Black", "Khaki", "Navy"]
     hats = ["Blue", "Green", "Brown"]
-    y = 70
+    columns = [(20, shirts), (260, pants), (500, hats)]
     box_w, box_h = 200, 30
-    for s in shirts:
-        draw.rectangle([20, y, 20 + box_w, y + box_h], outline="black")
-        draw.text((25, y + 6), s, fill="black", font=font)
-        y += 40
-
-    y = 70
-    for p in pants:
-        draw.rectangle([260, y, 260 + box_w, y + box_h], outline="black")
-        draw.text((265, y + 6), p, fill="black", font=font)
-        y += 40
-
-    y = 70
-    for h in hats:
-        draw.rectangle([500, y, 500 + box_w, y + box_h], outline="black")
-        draw.text((505, y + 6), h, fill="black", font=font)
-        y += 40
-
-    img.save(path)
-    print(f"Created {path}")
 
-def make_packed_spheres_image(path: Path, rows=2, cols=4, radius_cm=2):
+    # Box outlines are blitted straight into the pixel array, one column of boxes at a time
+    arr = np.full((280, 900, 3), 255, dtype=np.uint8)
+    for x0, items in columns:
+        x1 = x0 + box_w
+        ys = 70 + np.arange(len(items)) * 40
+        arr[ys, x0:x1 + 1] = 0
+        arr[ys + box_h, x0:x1 + 1] = 0
+        edge_rows = (ys[:, None] + np.arange(box_h + 1)).ravel()
+        arr[edge_rows, x0] = 0
+        arr[edge_rows, x1] = 0
+
+    img = Image.fromarray(arr)
+    draw = ImageDraw.Draw(img)
+    font = _get_font()
+
+    draw.text((10, 10), "Available Options", fill="black", font=font)
+    draw.text((20, 40), "Shirts:", fill="black", font=font)
+    for x0, items in columns:
+        for k, label in enumerate(items):
+            draw.text((x0 + 5, 70 + k * 40 + 6), label, fill="black", font=font)
+
+    return _save_png(img, path)
+
+def make_packed_spheres_image(path: Path, rows=2, cols=4, radius_cm=2, use_matplotlib=False) -> bytes:
     """
     Create a top-view image of tightly packed circles arranged in grid rows x cols.
     radius_cm is used for dimension labeling (visual).
+    Circles are drawn with pyvips when installed, otherwise directly with PIL;
+    pass use_matplotlib=True for the old matplotlib rendering.
+    Returns the PNG bytes written to path.
     """
     scale = 30  # pixels per cm approx
     diameter = 2 * radius_cm
     r_px = radius_cm * scale
     width_px = int(cols * diameter * scale)
     height_px = int(rows * diameter * scale)
+    d_px = int(diameter * scale)
+
+    # All circle centres at once, row-major like the grid
+    jj, ii = np.meshgrid(np.arange(cols), np.arange(rows))
+    cx = (jj * d_px + r_px).ravel()
+    cy = (ii * d_px + r_px).ravel()
+
+    if use_matplotlib:
+        # Imported lazily: matplotlib is slow to import and only needed on request.
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import EllipseCollection
+
+        fig, ax = plt.subplots(figsize=(width_px/100, height_px/100), dpi=100)
+        n = cx.size
+        circles = EllipseCollection(
+            widths=np.full(n, 2 * r_px), heights=np.full(n, 2 * r_px), angles=np.zeros(n),
+            units='xy', offsets=np.column_stack([cx, cy]), offset_transform=ax.transData,
+            facecolors='none', edgecolors='black', linewidths=1.5,
+        )
+        ax.add_collection(circles)
+
+        ax.set_xlim(0, width_px)
+        ax.set_ylim(0, height_px)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        plt.tight_layout(pad=0)
+        buf = BytesIO()
+        plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.02, pil_kwargs={"compress_level": 1})
+        plt.close()
+        data = buf.getvalue()
+        path.write_bytes(data)
+        print(f"Created {path}")
+        return data
+
+    if pyvips is not None:
+        try:
+            canvas = pyvips.Image.black(width_px, height_px, bands=3).new_from_image([255, 255, 255])
+            canvas = canvas.copy(interpretation="srgb")
+            for x, y in zip(cx.tolist(), cy.tolist()):
+                # Two concentric 1px rings for a 2px outline, kept inside the d_px cell like the PIL bbox
+                for rr in (r_px - 1, r_px - 2):
+                    canvas = canvas.draw_circle([0, 0, 0], x, y, rr)
+            data = canvas.write_to_buffer(".png", compression=1)
+            path.write_bytes(data)
+            print(f"Created {path}")
+            return data
+        except pyvips.Error:
+            pass
+
+    img = Image.new("RGB", (width_px, height_px), "white")
+    draw = ImageDraw.Draw(img)
+    bboxes = np.column_stack([cx - r_px, cy - r_px, cx + r_px - 1, cy + r_px - 1]).tolist()
+    for box in bboxes:
+        draw.ellipse(box, outline="black", width=2)
 
-    fig, ax = plt.subplots(figsize=(width_px/100, height_px/100), dpi=100)
-    for i in range(rows):
-        for j in range(cols):
-            cx = (j * diameter * scale) + r_px
-            cy = (i * diameter * scale) + r_px
-            circle = plt.Circle((cx, cy), r_px, edgecolor='black', fill=False, linewidth=1.5)
-            ax.add_patch(circle)
-
-    ax.set_xlim(0, width_px)
-    ax.set_ylim(0, height_px)
-    ax.set_aspect('equal')
-    ax.axis('off')
-    plt.tight_layout(pad=0)
-    plt.savefig(path, bbox_inches='tight', pad_inches=0.02)
-    plt.close()
-    print(f"Created {path}")
+    return _save_png(img, path)
 
-def create_docx(docx_path: Path, img1: Path, img2: Path):
-    doc = Document()
-    doc.add_heading('Generated Assessment Questions', level=1)
-    doc.add_paragraph('@title Central Middle — Derived Assessment')
-    doc.add_paragraph('@description Two generated quantitative math questions similar to the base examples.')
-
-    doc.add_paragraph('\n// Use this block for each question when adding Multiple Choice Questions (MCQ)')
-
-    # Question 1
-    doc.add_paragraph('\n@question Each student at Riverside Prep chooses a uniform consisting of 1 shirt, 1 pair of pants, and 1 hat. The table shows the available options for each item. How many different complete uniforms are possible?')
-    doc.add_paragraph('@instruction Select the number of possible uniform combinations from the options.')
-    doc.add_paragraph('@difficulty easy')
-    doc.add_paragraph('@Order 1')
-    doc.add_paragraph('@option (A) 18')
-    doc.add_paragraph('@option (B) 24')
-    doc.add_paragraph('@@option (C) 36')
-    doc.add_paragraph('@option (D) 48')
-    doc.add_paragraph('@option (E) 72')
-    doc.add_paragraph('@explanation ')
-    doc.add_paragraph('There are 4 shirt choices, 3 pants choices, and 3 hat choices. Total combinations = 4 × 3 × 3 = 36.')
-    doc.add_paragraph('@subject Quantitative Math')
-    doc.add_paragraph('@unit Numbers and Operations')
-    doc.add_paragraph('@topic Combinations / Counting')
-    doc.add_paragraph('@plusmarks 1')
-    doc.add_picture(str(img1), width=Inches(6))
-
-    # Question 2
-    doc.add_paragraph('\n@question The top view of a rectangular box containing 8 identical tightly packed spherical balls arranged in two rows of four is shown. If each ball has radius $2$ cm, which of the following is closest to the dimensions (height × width × length), in centimeters, of the rectangular package?')
-    doc.add_paragraph('@instruction Choose the correct dimensions from the options.')
-    doc.add_paragraph('@difficulty moderate')
-    doc.add_paragraph('@Order 2')
-    doc.add_paragraph('@option (A) $4 \\times 8 \\times 16$')
-    doc.add_paragraph('@option (B) $2 \\times 8 \\times 16$')
-    doc.add_paragraph('@@option (C) $4 \\times 12 \\times 18$')
-    doc.add_paragraph('@option (D) $6 \\times 8 \\times 16$')
-    doc.add_paragraph('@option (E) $8 \\times 12 \\times 24$')
-    doc.add_paragraph('@explanation ')
-    doc.add_paragraph('Top view shows two rows and four columns of circles (diameter = 4 cm). Width (short side) = 2 rows × 4 cm = 8 cm. Length = 4 columns × 4 cm = 16 cm. Height must accommodate one layer of balls: diameter = 4 cm. So dimensions: $4 \\times 8 \\times 16$.')
-    doc.add_paragraph('@subject Quantitative Math')
-    doc.add_paragraph('@unit Geometry and Measurement')
-    doc.add_paragraph('@topic Solid Figures / Coordinate Geometry')
-    doc.add_paragraph('@plusmarks 1')
-    doc.add_picture(str(img2), width=Inches(6))
-
-    doc.save(str(docx_path))
-    print(f"Created {docx_path}")
-
-def make_github_folder(base_dir: Path, img1: Path, img2: Path, docx_path: Path):
+def _add_paragraphs(doc, lines, before=None):
+    """
+    Insert one plain-text paragraph per line ahead of the `before` element (default:
+    end of the body), building the <w:p><w:r><w:t> elements directly instead of going
+    through doc.add_paragraph. Embedded newlines become <w:br/>, as they would with python-docx.
+    """
+    body = doc.element.body
+    anchor = before if before is not None else body.sectPr
+    for line in lines:
+        p = OxmlElement('w:p')
+        r = OxmlElement('w:r')
+        for k, chunk in enumerate(line.split('\n')):
+            if k:
+                r.append(OxmlElement('w:br'))
+            if chunk:
+                t = OxmlElement('w:t')
+                t.text = chunk
+                t.set(qn('xml:space'), 'preserve')
+                r.append(t)
+        p.append(r)
+        # Paragraphs must stay ahead of the trailing section properties
+        if anchor is not None:
+            anchor.addprevious(p)
+        else:
+            body.append(p)
+
+def _add_inline_image(doc, paragraph, blob: bytes, filename: str, width):
+    """
+    Embed image bytes as an inline picture in `paragraph`, scaled to `width`.
+    Equivalent to run.add_picture, but the size comes from a header parse of the
+    bytes already in memory and the image part is related directly, without
+    python-docx's file reopen and SHA1 lookup over existing image parts.
+    """
+    image = DocxImage.from_blob(blob)
+    # imageN.ext, numbered past every part already in the package, as python-docx names them
+    partname = doc.part.package.next_partname(f"/word/media/image%d.{image.ext}")
+    image_part = ImagePart.from_image(image, partname)
+    rId = doc.part.relate_to(image_part, RT.IMAGE)
+    cx = int(width)
+    cy = int(width * image.px_height / image.px_width)
+    inline = CT_Inline.new_pic_inline(doc.part.next_id, rId, filename, cx, cy)
+    paragraph.add_run()._r.add_drawing(inline)
+
+def create_docx(stream, img1: Path, img2: Path, img1_job=None, img2_job=None):
+    """
+    Build the assessment docx and save it into the file-like `stream`.
+    img1_job/img2_job are optional futures producing img1/img2 whose result is the PNG
+    bytes; the text is built right away and each job is only waited on before its
+    picture is added. Without a job the image is read from disk.
+    """
+    doc = Document(str(TEMPLATE_DOCX))
+    text_blocks = {
+        '{{HEADER}}': [
+            TITLE,
+            DESCRIPTION,
+            '\n// Use this block for each question when adding Multiple Choice Questions (MCQ)',
+        ],
+        '{{Q1_TEXT}}': ['\n' + QUESTIONS[0][0]] + QUESTIONS[0][1:],
+        '{{Q2_TEXT}}': ['\n' + QUESTIONS[1][0]] + QUESTIONS[1][1:],
+    }
+    images = {
+        '{{Q1_IMG}}': (img1, img1_job),
+        '{{Q2_IMG}}': (img2, img2_job),
+    }
+
+    # Single pass over the template: expand text placeholders, embed images in place
+    for p in list(doc.paragraphs):
+        key = p.text.strip()
+        if key in text_blocks:
+            _add_paragraphs(doc, text_blocks[key], before=p._p)
+            p._p.getparent().remove(p._p)
+        elif key in images:
+            img, job = images[key]
+            data = job.result() if job is not None else img.read_bytes()
+            p.text = ''
+            _add_inline_image(doc, p, data, img.name, Inches(6))
+
+    doc.save(stream)
+
+@contextmanager
+def _fast_zip_crc32():
+    """Temporarily route zipfile's per-entry CRC32 through libdeflate (PCLMULQDQ) if available."""
+    if deflate is None:
+        yield
+        return
+    orig = zipfile.crc32
+    zipfile.crc32 = deflate.crc32
+    try:
+        yield
+    finally:
+        zipfile.crc32 = orig
+
+def _write_zip(zip_path: Path, entries):
+    """Write (arcname, data, stored) entries with zipfile."""
+    with _fast_zip_crc32(), zipfile.ZipFile(zip_path, "w") as zf:
+        date_time = datetime.now().timetuple()[:6]
+        for arcname, data, stored in entries:
+            # Same permissions zf.write() gave the on-disk files: regular file, 0644
+            info = zipfile.ZipInfo(arcname, date_time=date_time)
+            info.external_attr = ZIP_ENTRY_MODE << 16
+            zf.writestr(info, data, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED,
+                        compresslevel=None if stored else 1)
+
+def _write_zip_streaming(zip_path: Path, entries):
+    """Write (arcname, data, stored) entries in a single forward pass with stream-zip."""
+    now = datetime.now()
+    mode = ZIP_ENTRY_MODE
+    def members():
+        for arcname, data, stored in entries:
+            if stored:
+                method = stream_zip.NO_COMPRESSION_64 if len(data) >= 0xFFFFFFFF else stream_zip.NO_COMPRESSION_32
+            else:
+                method = stream_zip.ZIP_AUTO(len(data), level=1)
+            yield arcname, now, mode, method, (data,)
+    with open(zip_path, "wb") as f:
+        for chunk in stream_zip.stream_zip(members()):
+            f.write(chunk)
+
+FICLONE = 0x40049409  # Linux ioctl: reflink dst to src (copy-on-write)
+
+def _fast_copy(src: Path, dst: Path, data: bytes):
+    """
+    Put src's contents (already in memory as `data`) at dst, reflinking when the
+    filesystem supports it and otherwise writing `data` through the same handle.
+    No hard links: the next run rewrites src in place, which would change dst too.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        dst.write_bytes(data)
+        return
+    with open(dst, "wb") as d:
+        try:
+            with open(src, "rb") as s:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.write(data)
+
+def make_github_folder(base_dir: Path, img1: Path, img2: Path, docx_data: bytes, docx_name: str = "generated_assessment.docx",
+                       img1_data: bytes = None, img2_data: bytes = None):
+    """
+    Build github_repo/ and github_repo.zip. img1_data/img2_data are the already
+    encoded PNGs (as returned by the image builders); when omitted they are read from disk.
+    """
     repo_dir = base_dir / "github_repo"
+    zip_path = base_dir / "github_repo.zip"
+
+    readme_text = "# Generated Assessment Questions\n\nThis repository contains two generated quantitative math questions in the requested Question Output Format, plus images.\n"
+
+    # (source path or None, path inside the repo folder and the zip, bytes)
+    manifest = [
+        (None, "README.md", readme_text.encode("utf-8")),
+        (None, "QUESTIONS.md", QUESTIONS_MD.encode("utf-8")),
+        (img1, f"images/{img1.name}", img1_data if img1_data is not None else img1.read_bytes()),
+        (img2, f"images/{img2.name}", img2_data if img2_data is not None else img2.read_bytes()),
+        (None, docx_name, docx_data),
+    ]
+
     if repo_dir.exists():
         shutil.rmtree(repo_dir)
     repo_dir.mkdir(parents=True)
@@ -146,86 +400,159 @@ def make_github_folder(base_dir: Path, img1: Path, img2: Path, docx_path: Path):
     images_dir = repo_dir / "images"
     images_dir.mkdir()
 
-    shutil.copy(img1, images_dir / img1.name)
-    shutil.copy(img2, images_dir / img2.name)
-
-    readme = repo_dir / "README.md"
-    readme.write_text("# Generated Assessment Questions\n\nThis repository contains two generated quantitative math questions in the requested Question Output Format, plus images.\n")
-    questions_md = repo_dir / "QUESTIONS.md"
-    questions_md.write_text(
-        (
-            "@title Central Middle — Derived Assessment\n"
-            "@description Two generated quantitative math questions similar to the base examples.\n\n"
-            "// Question 1\n"
-            "@question Each student at Riverside Prep chooses a uniform consisting of 1 shirt, 1 pair of pants, and 1 hat. The table shows the available options for each item. How many different complete uniforms are possible?\n"
-            "@instruction Select the number of possible uniform combinations from the options.\n"
-            "@difficulty easy\n"
-            "@Order 1\n"
-            "@option (A) 18\n"
-            "@option (B) 24\n"
-            "@@option (C) 36\n"
-            "@option (D) 48\n"
-            "@option (E) 72\n"
-            "@explanation \n"
-            "There are 4 shirt choices, 3 pants choices, and 3 hat choices. Total combinations = 4 × 3 × 3 = 36.\n"
-            "@subject Quantitative Math\n"
-            "@unit Numbers and Operations\n"
-            "@topic Combinations / Counting\n"
-            "@plusmarks 1\n\n"
-            "// Question 2\n"
-            "@question The top view of a rectangular box containing 8 identical tightly packed spherical balls arranged in two rows of four is shown. If each ball has radius $2$ cm, which of the following is closest to the dimensions (height × width × length), in centimeters, of the rectangular package?\n"
-            "@instruction Choose the correct dimensions from the options.\n"
-            "@difficulty moderate\n"
-            "@Order 2\n"
-            "@option (A) $4 \\times 8 \\times 16$\n"
-            "@option (B) $2 \\times 8 \\times 16$\n"
-            "@@option (C) $4 \\times 12 \\times 18$\n"
-            "@option (D) $6 \\times 8 \\times 16$\n"
-            "@option (E) $8 \\times 12 \\times 24$\n"
-            "@explanation \n"
-            "Top view shows two rows and four columns of circles (diameter = 4 cm). Width (short side) = 2 rows × 4 cm = 8 cm. Length = 4 columns × 4 cm = 16 cm. Height must accommodate one layer of balls: diameter = 4 cm. So dimensions: $4 \\times 8 \\times 16$.\n"
-            "@subject Quantitative Math\n"
-            "@unit Geometry and Measurement\n"
-            "@topic Solid Figures / Coordinate Geometry\n"
-            "@plusmarks 1\n"
-        )
-    )
-
-    # Copy docx as well
-    shutil.copy(docx_path, repo_dir / docx_path.name)
+    # Put each artifact in the repo folder (reflinking files where possible)
+    for src, arcname, data in manifest:
+        if src is not None:
+            _fast_copy(src, repo_dir / arcname, data)
+        else:
+            (repo_dir / arcname).write_bytes(data)
 
-    # Create zip
-    zip_path = base_dir / "github_repo.zip"
+    # ...and into the zip, straight from the in-memory bytes
     if zip_path.exists():
         zip_path.unlink()
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for root, dirs, files in os.walk(repo_dir):
-            for f in files:
-                full = Path(root) / f
-                zf.write(full, arcname=str(full.relative_to(repo_dir)))
+    entries = [
+        (arcname, data, Path(arcname).suffix.lower() in STORED_EXTS or len(data) < STORED_BELOW_BYTES)
+        for _, arcname, data in manifest
+    ]
+    # stream-zip always computes CRCs with zlib, so when libdeflate is available the
+    # zipfile writer (with _fast_zip_crc32) is preferred over streaming
+    if stream_zip is not None and deflate is None:
+        _write_zip_streaming(zip_path, entries)
+    else:
+        _write_zip(zip_path, entries)
     print(f"Created {zip_path}")
     return repo_dir, zip_path
 
+def _walk_files(directory):
+    """Yield os.DirEntry objects for every file under directory, skipping .git; one scandir per directory."""
+    with os.scandir(directory) as it:
+        for e in it:
+            if e.is_dir(follow_symlinks=False):
+                if e.name != ".git":
+                    yield from _walk_files(e.path)
+            else:
+                yield e
+
+def _git_run(repo_dir: Path, cmd, stdin=None, capture=False, check=True):
+    print("> " + " ".join(cmd))
+    res = subprocess.run(cmd, cwd=str(repo_dir), check=check, input=stdin, capture_output=capture)
+    return res.stdout if res.returncode == 0 else None
+
+def _is_ssh_url(url: str) -> bool:
+    """True for ssh:// URLs and scp-like user@host:path remotes."""
+    if url.startswith(("ssh://", "git+ssh://", "ssh+git://")):
+        return True
+    if "://" in url or ":" not in url:
+        return False
+    host = url.split(":", 1)[0]
+    return len(host) > 1 and "/" not in host and "\\" not in host
+
+def _pygit2_signature(repo, role: str):
+    """Signature for role "AUTHOR"/"COMMITTER", honouring GIT_<role>_NAME/EMAIL like the git CLI."""
+    name = os.environ.get(f"GIT_{role}_NAME")
+    email = os.environ.get(f"GIT_{role}_EMAIL")
+    if name and email:
+        return pygit2.Signature(name, email)
+    return repo.default_signature
+
+def _pygit2_commit_and_push(repo_dir: Path, remote_url: str, branch: str):
+    """Same as the CLI path, but init/add/commit happen in-process through libgit2."""
+    ref_name = f"refs/heads/{branch}"
+    if (repo_dir / ".git").exists():
+        repo = pygit2.Repository(str(repo_dir))
+    else:
+        repo = pygit2.init_repository(str(repo_dir), initial_head=branch)
+
+    repo.index.add_all()
+    repo.index.write()
+    tree = repo.index.write_tree()
+    author = _pygit2_signature(repo, "AUTHOR")
+    committer = _pygit2_signature(repo, "COMMITTER")
+    # Parent is the branch tip, whatever HEAD currently points at; then move HEAD onto the branch
+    ref = repo.references.get(ref_name)
+    parents = [ref.target] if ref is not None else []
+    repo.create_commit(ref_name, author, committer, "Add generated assessment questions", tree, parents)
+    repo.set_head(ref_name)
+
+    # set remote and upstream tracking, as 'git push -u origin <branch>' would
+    if "origin" in repo.remotes.names():
+        repo.remotes.set_url("origin", remote_url)
+    else:
+        repo.remotes.create("origin", remote_url)
+    repo.config[f"branch.{branch}.remote"] = "origin"
+    repo.config[f"branch.{branch}.merge"] = ref_name
+
+    # libgit2 can only authenticate ssh remotes here (keys from the agent); it doesn't use
+    # git's credential helpers, so every other remote goes straight to the CLI
+    if not _is_ssh_url(remote_url):
+        _git_run(repo_dir, ["git", "push", "-u", "origin", branch])
+        return
+
+    class AgentCallbacks(pygit2.RemoteCallbacks):
+        def credentials(self, url, username_from_url, allowed_types):
+            if allowed_types & pygit2.enums.CredentialType.SSH_KEY:
+                return pygit2.KeypairFromAgent(username_from_url or "git")
+            return None
+
+    try:
+        repo.remotes["origin"].push([f"{ref_name}:{ref_name}"], callbacks=AgentCallbacks())
+    except pygit2.GitError:
+        # e.g. no usable agent key; the CLI may still find one through ssh config
+        _git_run(repo_dir, ["git", "push", "-u", "origin", branch])
+
 def git_init_and_push(repo_dir: Path, remote_url: str, branch: str = "main"):
     """
     Initialize git repo in repo_dir (if not already initialized), commit and push to remote_url.
     remote_url must be a valid git remote that you have push access to.
+    Uses pygit2 when it is installed, otherwise (or if libgit2 fails) the git command line.
     """
-    cwd = str(repo_dir)
-    def run(cmd):
-        print("> " + " ".join(cmd))
-        subprocess.run(cmd, cwd=cwd, check=True)
-
-    # Init if needed
-    if not (repo_dir / ".git").exists():
-        run(["git", "init"])
-    run(["git", "checkout", "-B", branch])
-    run(["git", "add", "."])
-    run(["git", "commit", "-m", "Add generated assessment questions"])
-    run(["git", "remote", "remove", "origin"],) if subprocess.run(["git", "remote"], cwd=cwd, capture_output=True).returncode == 0 else None
-    # set remote
-    run(["git", "remote", "add", "origin", remote_url])
-    # push
+    if pygit2 is not None:
+        try:
+            _pygit2_commit_and_push(repo_dir, remote_url, branch)
+            print("Pushed to remote:", remote_url)
+            return
+        except (pygit2.GitError, KeyError) as e:
+            # e.g. no user.name configured for libgit2; the CLI path reports its own errors
+            print(f"pygit2 failed ({e}); falling back to the git command line")
+
+    def run(cmd, stdin=None, capture=False, check=True):
+        return _git_run(repo_dir, cmd, stdin=stdin, capture=capture, check=check)
+
+    # Init if needed; init.defaultBranch makes a separate checkout unnecessary.
+    # make_github_folder recreates repo_dir each run, so main always takes the fresh path,
+    # where there is no branch tip or origin to probe for.
+    fresh = not (repo_dir / ".git").exists()
+    if fresh:
+        run(["git", "-c", f"init.defaultBranch={branch}", "init"])
+        parent = None
+    else:
+        run(["git", "symbolic-ref", "HEAD", f"refs/heads/{branch}"])
+        # Keep history when pushing again from an existing repo (works with packed refs too)
+        parent = run(["git", "rev-parse", "--verify", "-q", f"refs/heads/{branch}"], capture=True, check=False)
+    ident = run(["git", "var", "GIT_COMMITTER_IDENT"], capture=True).strip()
+
+    # Build the whole commit as one fast-import stream instead of add + commit
+    files = sorted(os.path.relpath(e.path, repo_dir).replace(os.sep, "/") for e in _walk_files(repo_dir))
+    stream = []
+    for mark, f in enumerate(files, 1):
+        data = (repo_dir / f).read_bytes()
+        stream.append(b"blob\nmark :%d\ndata %d\n%s\n" % (mark, len(data), data))
+    message = b"Add generated assessment questions"
+    stream.append(b"commit refs/heads/%s\ncommitter %s\ndata %d\n%s\n" % (branch.encode(), ident, len(message), message))
+    if parent:
+        stream.append(b"from %s\n" % parent.strip())
+    for mark, f in enumerate(files, 1):
+        stream.append(b"M 100644 :%d %s\n" % (mark, f.encode("utf-8")))
+    stream.append(b"\n")
+    run(["git", "fast-import", "--quiet"], stdin=b"".join(stream))
+    # fast-import doesn't touch the index; sync it so the work tree shows as clean
+    run(["git", "read-tree", branch])
+
+    # set remote (set-url when origin already exists) and push with upstream tracking
+    if not fresh and run(["git", "config", "--get", "remote.origin.url"], capture=True, check=False) is not None:
+        run(["git", "remote", "set-url", "origin", remote_url])
+    else:
+        run(["git", "remote", "add", "origin", remote_url])
     run(["git", "push", "-u", "origin", branch])
     print("Pushed to remote:", remote_url)
 
@@ -234,6 +561,7 @@ def main():
     parser.add_argument("--outdir", default="assessment_output", help="Output directory")
     parser.add_argument("--push-repo", default=None, help="Remote git repo URL to push (optional)")
     parser.add_argument("--branch", default="main", help="Branch name for push")
+    parser.add_argument("--use-matplotlib", action="store_true", help="Render the spheres image with matplotlib instead of pyvips/PIL")
     args = parser.parse_args()
 
     base = Path(args.outdir).absolute()
@@ -241,17 +569,20 @@ def main():
 
     img1 = base / "uniform_table.png"
     img2 = base / "rect_package_topview_8.png"
-    docx_path = base / "generated_assessment.docx"
 
-    # Create images
-    make_uniform_image(img1)
-    make_packed_spheres_image(img2, rows=2, cols=4, radius_cm=2)
+    # Render both images in worker processes while the docx text is built
+    with ProcessPoolExecutor(max_workers=2) as ex:
+        f1 = ex.submit(make_uniform_image, img1)
+        f2 = ex.submit(make_packed_spheres_image, img2, 2, 4, 2, args.use_matplotlib)
 
-    # Create docx
-    create_docx(docx_path, img1, img2)
+        # Create docx in memory; it is written to disk only once, by make_github_folder
+        buf = BytesIO()
+        create_docx(buf, img1, img2, img1_job=f1, img2_job=f2)
 
     # Make github-ready folder + zip
-    repo_dir, zip_path = make_github_folder(base, img1, img2, docx_path)
+    repo_dir, zip_path = make_github_folder(base, img1, img2, buf.getvalue(),
+                                            img1_data=f1.result(), img2_data=f2.result())
+    docx_path = repo_dir / "generated_assessment.docx"
 
     print("All done. Files created in:", base)
     print(" - Docx:", docx_path)